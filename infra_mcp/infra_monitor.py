@@ -3,17 +3,28 @@ Infrastructure monitoring utilities for collecting system information.
 """
 
 import os
+import mmap
+import time
 import subprocess
 import psutil
 import logging
 from typing import Dict, List, Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _from_timestamp(timestamp: float) -> datetime:
+    """datetime for a POSIX timestamp. Session start times repeat between calls."""
+    return datetime.fromtimestamp(timestamp)
+
+
 class InfraMonitor:
     """Infrastructure monitoring and data collection utilities."""
     
@@ -27,12 +38,43 @@ class InfraMonitor:
             "/var/log/system.log",  # macOS
             "/var/log/boot.log"
         ]
+        # (st_mtime_ns, parsed users) of the last /etc/passwd read
+        self._passwd_cache = (None, None)
+        # (scanned_at, entry paths) of the last /var/log listing
+        self._log_dir_cache = (None, frozenset())
+        # service names -> (checked_at, statuses) of recent systemctl queries
+        self._service_cache = {}
+        # Read every log type from <dir>/<log_type>.log instead of system sources
+        self._log_dir_override = os.getenv("INFRAGPT_LOG_DIR")
+        # Prime the CPU counters so non-blocking cpu_percent() calls are meaningful
+        psutil.cpu_percent(interval=None)
+        # Fixed for the lifetime of the process
+        self._uname = os.uname()
+        self._cpu_count = psutil.cpu_count()
+        self._boot_timestamp = psutil.boot_time()
+        self._boot_time = datetime.fromtimestamp(self._boot_timestamp)
     
-    def get_system_info(self) -> Dict[str, Any]:
-        """Get basic system information."""
+    def get_system_info(self, cpu_interval: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get basic system information.
+        
+        Args:
+            cpu_interval: Seconds to block while sampling CPU usage. By default the
+                usage since the previous call is returned without blocking.
+        """
         try:
-            boot_time = datetime.fromtimestamp(psutil.boot_time())
-            uname = os.uname()
+            uname = self._uname
+            memory = self._read_meminfo()
+            if memory is None:
+                vm = psutil.virtual_memory()
+                memory = {
+                    "total": vm.total,
+                    "available": vm.available,
+                    "percent": vm.percent,
+                    "used": vm.used,
+                    "free": vm.free
+                }
+            disk = psutil.disk_usage('/')
             return {
                 "hostname": uname.nodename,
                 "platform": uname.sysname,
@@ -40,38 +82,75 @@ class InfraMonitor:
                 "platform_version": uname.version,
                 "architecture": uname.machine,
                 "processor": getattr(uname, 'processor', 'unknown'),
-                "cpu_count": psutil.cpu_count(),
-                "cpu_percent": psutil.cpu_percent(interval=1),
-                "memory": {
-                    "total": psutil.virtual_memory().total,
-                    "available": psutil.virtual_memory().available,
-                    "percent": psutil.virtual_memory().percent,
-                    "used": psutil.virtual_memory().used,
-                    "free": psutil.virtual_memory().free
-                },
+                "cpu_count": self._cpu_count,
+                "cpu_percent": psutil.cpu_percent(interval=cpu_interval),
+                "memory": memory,
                 "disk": {
-                    "total": psutil.disk_usage('/').total,
-                    "used": psutil.disk_usage('/').used,
-                    "free": psutil.disk_usage('/').free,
-                    "percent": psutil.disk_usage('/').percent
+                    "total": disk.total,
+                    "used": disk.used,
+                    "free": disk.free,
+                    "percent": disk.percent
                 },
-                "boot_time": boot_time.isoformat(),
-                "uptime": str(datetime.now() - boot_time)
+                "boot_time": self._boot_time,
+                "uptime": str(datetime.now() - self._boot_time)
             }
         except Exception as e:
             logger.error(f"Error getting system info: {e}")
             return {"error": str(e)}
     
+    def _read_meminfo(self) -> Optional[Dict[str, Any]]:
+        """
+        Memory usage read straight from /proc/meminfo (Linux only).
+        
+        Mirrors psutil.virtual_memory(): used = total - available. Returns None
+        where /proc/meminfo is unavailable so callers can fall back to psutil.
+        """
+        try:
+            with open('/proc/meminfo', 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        
+        values = {}
+        for line in data.splitlines():
+            key, _, rest = line.partition(b':')
+            fields = rest.split()
+            if fields:
+                values[key] = int(fields[0]) * 1024
+        
+        total = values.get(b'MemTotal')
+        if not total:
+            return None
+        free = values.get(b'MemFree', 0)
+        available = values.get(b'MemAvailable', free)
+        return {
+            "total": total,
+            "available": available,
+            "percent": round((total - available) / total * 100, 1),
+            "used": total - available,
+            "free": free
+        }
+    
+    def collect_all(self) -> Dict[str, Any]:
+        """Run all collectors concurrently and return their results keyed by area."""
+        collectors = [
+            ("system", self.get_system_info),
+            ("services", self.get_service_status),
+            ("users", self.get_user_info),
+            ("logs", self.get_logs),
+            ("network", self.get_network_info)
+        ]
+        
+        with ThreadPoolExecutor(max_workers=len(collectors)) as executor:
+            futures = {name: executor.submit(fn) for name, fn in collectors}
+            return {name: future.result() for name, future in futures.items()}
+    
     def get_service_status(self, service_name: Optional[str] = None) -> Dict[str, Any]:
         """Get service status using systemctl (Linux) or other system tools."""
         try:
-            services = {}
-            
             if service_name:
                 # Get specific service status
-                result = self._get_systemd_service_status(service_name)
-                if result:
-                    services[service_name] = result
+                services = self._get_systemd_services_bulk([service_name])
             else:
                 # Get common services status
                 common_services = [
@@ -79,13 +158,12 @@ class InfraMonitor:
                     "postgres", "mysql", "redis", "mongodb", "cron", "crond"
                 ]
                 
-                for service in common_services:
-                    status = self._get_systemd_service_status(service)
-                    if status:
-                        services[service] = status
+                services = self._get_systemd_services_bulk(common_services)
             
             # Add running processes info
             processes = []
+            # process_iter(attrs) reads each process's fields under oneshot()
+            # and fills fields it cannot read with None
             for proc in psutil.process_iter(['pid', 'name', 'status', 'cpu_percent', 'memory_percent']):
                 try:
                     processes.append(proc.info)
@@ -109,44 +187,61 @@ class InfraMonitor:
             logger.error(f"Error getting service status: {e}")
             return {"error": str(e)}
     
-    def _get_systemd_service_status(self, service_name: str) -> Optional[Dict[str, Any]]:
-        """Get systemd service status."""
+    def _get_systemd_services_bulk(self, service_names: List[str], ttl: float = 2.0) -> Dict[str, Dict[str, Any]]:
+        """
+        Get systemd status for several services with a single systemctl call.
+        
+        Results are reused for ``ttl`` seconds for the same set of services.
+        """
+        key = tuple(service_names)
+        now = time.monotonic()
+        cached = self._service_cache.get(key)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        
+        services = self._query_systemd_services(service_names)
+        if len(self._service_cache) >= 64:
+            # Keys come from client arguments; drop expired entries before growing further
+            self._service_cache = {k: v for k, v in self._service_cache.items() if now - v[0] < ttl}
+        self._service_cache[key] = (now, services)
+        return services
+    
+    def _query_systemd_services(self, service_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Run systemctl show for the given services and parse their states."""
+        units = [name if '.' in name else f"{name}.service" for name in service_names]
         try:
-            # Try with .service extension first
             result = subprocess.run(
-                ["systemctl", "is-active", f"{service_name}.service"],
-                capture_output=True, text=True, timeout=5
-            )
-            
-            if result.returncode == 0:
-                status = result.stdout.strip()
-            else:
-                # Try without .service extension
-                result = subprocess.run(
-                    ["systemctl", "is-active", service_name],
-                    capture_output=True, text=True, timeout=5
-                )
-                status = result.stdout.strip() if result.returncode == 0 else "inactive"
-            
-            # Get enabled status
-            enabled_result = subprocess.run(
-                ["systemctl", "is-enabled", f"{service_name}.service"],
+                ["systemctl", "show", "--no-pager", "--property=ActiveState,UnitFileState"] + units,
                 capture_output=True, text=True, timeout=5
             )
-            enabled = enabled_result.stdout.strip() if enabled_result.returncode == 0 else "unknown"
-            
-            return {
-                "status": status,
-                "enabled": enabled,
-                "checked_at": datetime.now().isoformat()
-            }
-            
         except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError):
-            # systemctl not available or service doesn't exist
-            return None
+            # systemctl not available
+            return {}
         except Exception as e:
-            logger.error(f"Error checking service {service_name}: {e}")
-            return None
+            logger.error(f"Error checking services {', '.join(service_names)}: {e}")
+            return {}
+        
+        checked_at = datetime.now()
+        
+        if result.returncode != 0:
+            # systemd not reachable; report like a failed is-active/is-enabled
+            return {
+                name: {"status": "inactive", "enabled": "unknown", "checked_at": checked_at}
+                for name in service_names
+            }
+        
+        # Properties are printed as Key=Value, one blank-line separated block per unit
+        services = {}
+        blocks = result.stdout.strip().split('\n\n')
+        for name, block in zip(service_names, blocks):
+            props = dict(line.split('=', 1) for line in block.splitlines() if '=' in line)
+            services[name] = {
+                "status": props.get("ActiveState") or "inactive",
+                "enabled": props.get("UnitFileState") or "unknown",
+                "checked_at": checked_at
+            }
+        
+        return services
     
     def get_user_info(self) -> Dict[str, Any]:
         """Get user information and active sessions."""
@@ -160,39 +255,69 @@ class InfraMonitor:
                 users[user.name].append({
                     "terminal": user.terminal,
                     "host": user.host,
-                    "started": datetime.fromtimestamp(user.started).isoformat(),
+                    "started": _from_timestamp(user.started),
                     "pid": user.pid if hasattr(user, 'pid') else None
                 })
             
             # Try to get additional user info from /etc/passwd
-            passwd_users = []
-            try:
-                with open('/etc/passwd', 'r') as f:
-                    for line in f:
-                        parts = line.strip().split(':')
-                        if len(parts) >= 6:
-                            passwd_users.append({
-                                "username": parts[0],
-                                "uid": parts[2],
-                                "gid": parts[3],
-                                "home": parts[5],
-                                "shell": parts[6] if len(parts) > 6 else ""
-                            })
-            except (FileNotFoundError, PermissionError):
-                pass
+            passwd_users = self._get_passwd_users()
             
             return {
                 "active_sessions": users,
                 "total_active_users": len(users),
                 "system_users": passwd_users,
                 "current_user": os.getenv('USER', 'unknown'),
-                "collected_at": datetime.now().isoformat()
+                "collected_at": datetime.now()
             }
             
         except Exception as e:
             logger.error(f"Error getting user info: {e}")
             return {"error": str(e)}
     
+    def _get_passwd_users(self) -> List[Dict[str, str]]:
+        """Parse /etc/passwd, reusing the previous result while the file is unchanged."""
+        try:
+            mtime = os.stat('/etc/passwd').st_mtime_ns
+            if self._passwd_cache[0] == mtime:
+                return self._passwd_cache[1]
+            
+            passwd_users = []
+            with open('/etc/passwd', 'rb') as f:
+                for raw in f:
+                    parts = raw.rstrip(b'\n').split(b':', 6)
+                    if len(parts) < 7:
+                        continue
+                    passwd_users.append({
+                        "username": parts[0].decode(errors='replace'),
+                        "uid": parts[2].decode(errors='replace'),
+                        "gid": parts[3].decode(errors='replace'),
+                        "home": parts[5].decode(errors='replace'),
+                        "shell": parts[6].decode(errors='replace')
+                    })
+            
+            self._passwd_cache = (mtime, passwd_users)
+            return passwd_users
+        except (FileNotFoundError, PermissionError):
+            return []
+    
+    def _log_path_exists(self, path: str, ttl: float = 60.0) -> bool:
+        """Check a log path against a cached listing of /var/log, refreshed every ``ttl`` seconds."""
+        log_dir = "/var/log"
+        if os.path.dirname(path) != log_dir:
+            return os.path.exists(path)
+        
+        now = time.monotonic()
+        scanned_at, entries = self._log_dir_cache
+        if scanned_at is None or now - scanned_at > ttl:
+            try:
+                with os.scandir(log_dir) as it:
+                    entries = frozenset(entry.path for entry in it)
+            except OSError:
+                entries = frozenset()
+            self._log_dir_cache = (now, entries)
+        
+        return path in entries
+    
     def get_logs(self, log_type: str = "syslog", lines: int = 100, since: Optional[str] = None) -> Dict[str, Any]:
         """Get system logs."""
         try:
@@ -200,47 +325,41 @@ class InfraMonitor:
             log_file = None
             
             # Determine log file path
-            if log_type == "syslog":
+            if self._log_dir_override:
+                log_file = os.path.join(self._log_dir_override, f"{os.path.basename(log_type)}.log")
+            elif log_type == "syslog":
                 log_file = "/var/log/syslog"
             elif log_type == "auth":
                 log_file = "/var/log/auth.log"
             elif log_type == "kernel":
                 log_file = "/var/log/kern.log"
             elif log_type == "dmesg":
-                # Use dmesg command for kernel ring buffer
-                try:
-                    result = subprocess.run(
-                        ["dmesg", "--time-format=iso", f"--lines={lines}"],
-                        capture_output=True, text=True, timeout=10
-                    )
-                    if result.returncode == 0:
-                        logs = result.stdout.strip().split('\n')
-                except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError):
-                    pass
+                # Read the kernel ring buffer directly, falling back to the dmesg command
+                logs = self._read_kmsg(lines)
+                if logs is None:
+                    logs = []
+                    try:
+                        result = subprocess.run(
+                            ["dmesg", "--time-format=iso", f"--lines={lines}"],
+                            capture_output=True, text=True, timeout=10
+                        )
+                        if result.returncode == 0:
+                            logs = result.stdout.strip().split('\n')
+                    except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError):
+                        pass
             else:
                 # Try to find the log file in common locations
                 for path in self.log_paths:
-                    if log_type in path and os.path.exists(path):
+                    if log_type in path and self._log_path_exists(path):
                         log_file = path
                         break
             
             # Read from log file if found
-            if log_file and os.path.exists(log_file) and not logs:
+            if log_file and self._log_path_exists(log_file) and not logs:
                 try:
-                    with open(log_file, 'r') as f:
-                        all_lines = f.readlines()
-                        logs = [line.strip() for line in all_lines[-lines:]]
+                    logs = self._tail(log_file, lines)
                 except PermissionError:
-                    # Try using tail command
-                    try:
-                        result = subprocess.run(
-                            ["tail", f"-{lines}", log_file],
-                            capture_output=True, text=True, timeout=10
-                        )
-                        if result.returncode == 0:
-                            logs = result.stdout.strip().split('\n')
-                    except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
-                        pass
+                    logger.warning(f"Permission denied reading {log_file}")
             
             return {
                 "log_type": log_type,
@@ -248,17 +367,86 @@ class InfraMonitor:
                 "lines_requested": lines,
                 "lines_returned": len(logs),
                 "logs": logs,
-                "collected_at": datetime.now().isoformat()
+                "collected_at": datetime.now()
             }
             
         except Exception as e:
             logger.error(f"Error getting logs: {e}")
             return {"error": str(e)}
     
-    def get_network_info(self) -> Dict[str, Any]:
-        """Get network interface and connection information."""
+    def _tail(self, path: str, lines: int) -> List[str]:
+        """Return the last ``lines`` lines of a file, scanning backwards through an mmap."""
+        if lines <= 0:
+            return []
+        
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return []
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = size - 1 if mm[size - 1] == ord('\n') else size
+                pos = end
+                for _ in range(lines):
+                    pos = mm.rfind(b'\n', 0, pos)
+                    if pos < 0:
+                        break
+                data = mm[pos + 1:end]
+        
+        # Decode only the kept lines, in a single pass
+        text = data.decode('utf-8', errors='replace')
+        return [line.strip() for line in text.split('\n')]
+    
+    def _read_kmsg(self, lines: int) -> Optional[List[str]]:
+        """
+        Read the last ``lines`` kernel messages from /dev/kmsg.
+        
+        Returns None if /dev/kmsg cannot be read, so callers can fall back to dmesg.
+        """
+        try:
+            fd = os.open('/dev/kmsg', os.O_RDONLY | os.O_NONBLOCK)
+        except OSError:
+            return None
+        
+        records = deque(maxlen=max(lines, 0))
+        try:
+            while True:
+                try:
+                    record = os.read(fd, 8192)
+                except BlockingIOError:
+                    break
+                except BrokenPipeError:
+                    # Record was overwritten while reading; continue with the next one
+                    continue
+                if not record:
+                    break
+                records.append(record)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        
+        # Records look like "prio,seq,usec_since_boot,flags;message\n[ KEY=value...]"
+        logs = []
+        for record in records:
+            header, _, message = record.partition(b';')
+            fields = header.split(b',')
+            timestamp = datetime.fromtimestamp(self._boot_timestamp + int(fields[2]) / 1e6).astimezone()
+            message = message.split(b'\n', 1)[0].decode('utf-8', errors='replace')
+            logs.append(f"{timestamp.isoformat()} {message}")
+        return logs
+    
+    def get_network_info(self, max_connections: int = 20) -> Dict[str, Any]:
+        """
+        Get network interface and connection information.
+        
+        Args:
+            max_connections: Number of connections to report. psutil still reads
+                the full connection tables; only the reported entries are formatted.
+        """
         try:
             interfaces = {}
+            if_stats = psutil.net_if_stats()
             for interface, addresses in psutil.net_if_addrs().items():
                 interface_info = {
                     "addresses": [],
@@ -274,23 +462,24 @@ class InfraMonitor:
                     })
                 
                 # Get interface statistics
-                try:
-                    stats = psutil.net_if_stats()[interface]
+                stats = if_stats.get(interface)
+                if stats:
                     interface_info["stats"] = {
                         "isup": stats.isup,
                         "duplex": str(stats.duplex),
                         "speed": stats.speed,
                         "mtu": stats.mtu
                     }
-                except KeyError:
-                    pass
                 
                 interfaces[interface] = interface_info
             
-            # Get network connections
+            # Get network connections. net_connections() returns a fully built list
+            # (and 'inet' is its default), so the limit saves formatting, not parsing
             connections = []
             try:
-                for conn in psutil.net_connections():
+                for i, conn in enumerate(psutil.net_connections(kind='inet')):
+                    if i >= max_connections:
+                        break
                     connections.append({
                         "fd": conn.fd,
                         "family": str(conn.family),
@@ -305,9 +494,9 @@ class InfraMonitor:
             
             return {
                 "interfaces": interfaces,
-                "connections": connections[:20],  # Limit to avoid overwhelming output
+                "connections": connections,
                 "io_counters": dict(psutil.net_io_counters()._asdict()),
-                "collected_at": datetime.now().isoformat()
+                "collected_at": datetime.now()
             }
             
         except Exception as e:
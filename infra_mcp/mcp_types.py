@@ -2,52 +2,59 @@
 MCP (Model Context Protocol) types and data structures.
 """
 
+import sys
 from typing import Dict, Any, List, Optional, Union, Literal
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, is_dataclass
+from functools import lru_cache
 from enum import Enum
 
+import orjson
+
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
 
 class McpVersion(str, Enum):
     V1_0 = "1.0"
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ToolCapability:
     tools: bool = True
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ResourceCapability:
     subscribe: Optional[bool] = None
     list_changed: Optional[bool] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ServerCapabilities:
     tools: Optional[ToolCapability] = None
     resources: Optional[ResourceCapability] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ClientCapabilities:
     tools: Optional[ToolCapability] = None
     resources: Optional[ResourceCapability] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class InitializeRequest:
     method: str = "initialize"
     params: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class InitializeResult:
     protocolVersion: str = McpVersion.V1_0
     capabilities: ServerCapabilities = field(default_factory=ServerCapabilities)
     serverInfo: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ToolParameter:
     type: str
     description: str
@@ -55,31 +62,31 @@ class ToolParameter:
     enum: Optional[List[str]] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class Tool:
     name: str
     description: str
     inputSchema: Dict[str, Any]
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ToolListResult:
     tools: List[Tool]
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ToolCallRequest:
     method: str = "tools/call"
     params: Dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ToolResult:
     content: List[Dict[str, Any]]
     isError: bool = False
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class McpRequest:
     jsonrpc: str = "2.0"
     id: Union[str, int] = ""
@@ -87,7 +94,7 @@ class McpRequest:
     params: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class McpResponse:
     jsonrpc: str = "2.0"
     id: Union[str, int] = ""
@@ -95,26 +102,55 @@ class McpResponse:
     error: Optional[Dict[str, Any]] = None
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class McpError:
     code: int
     message: str
     data: Optional[Dict[str, Any]] = None
 
 
+# Field types copied as-is, without inspecting the value
+_PLAIN_TYPES = (str, int, float, bool)
+
+
+@lru_cache(maxsize=None)
+def _make_dumper(cls):
+    """Generate a straight-line to-dict function for one dataclass type, omitting None fields."""
+    body = []
+    for f in fields(cls):
+        convert = "value" if f.type in _PLAIN_TYPES else "_to_plain(value)"
+        body.append(
+            f"    value = obj.{f.name}\n"
+            f"    if value is not None:\n"
+            f"        result[{f.name!r}] = {convert}\n"
+        )
+    source = f"def dump(obj):\n    result = {{}}\n{''.join(body)}    return result\n"
+    namespace = {"_to_plain": _to_plain}
+    exec(source, namespace)
+    return namespace["dump"]
+
+
+def _to_plain(value):
+    """Convert nested dataclasses inside a field value."""
+    cls = type(value)
+    if cls in _PLAIN_TYPES:
+        return value
+    if hasattr(cls, '__dataclass_fields__'):
+        return _make_dumper(cls)(value)
+    if cls is list:
+        return [_to_plain(item) for item in value]
+    if cls is dict:
+        return {key: _to_plain(item) for key, item in value.items()}
+    return value
+
+
 def dataclass_to_dict(obj):
-    """Convert dataclass to dictionary."""
-    if hasattr(obj, '__dataclass_fields__'):
-        result = {}
-        for field_name, field_def in obj.__dataclass_fields__.items():
-            value = getattr(obj, field_name)
-            if value is not None:
-                if hasattr(value, '__dataclass_fields__'):
-                    result[field_name] = dataclass_to_dict(value)
-                elif isinstance(value, list):
-                    result[field_name] = [dataclass_to_dict(item) if hasattr(item, '__dataclass_fields__') else item for item in value]
-                else:
-                    result[field_name] = value
-        return result
+    """Convert dataclass to dictionary, omitting fields that are None."""
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return _make_dumper(type(obj))(obj)
     return obj
 
+
+def to_json(obj) -> bytes:
+    """Serialize a dataclass (or plain value) to JSON bytes, omitting fields that are None."""
+    return orjson.dumps(dataclass_to_dict(obj), default=str)
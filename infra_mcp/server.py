@@ -8,12 +8,19 @@ This server provides tools for monitoring system infrastructure including:
 - AI-powered log analysis using Gemini LLM
 """
 
-import json
+import os
 import sys
+import queue
 import asyncio
+import inspect
 import logging
-from typing import Dict, Any, List, Optional, Union
+import threading
+import time
+import orjson
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Callable, List, Optional, Union
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from .mcp_types import (
     Tool, ToolListResult, ToolResult, InitializeResult, 
@@ -23,18 +30,119 @@ from .mcp_types import (
 from .infra_monitor import InfraMonitor
 from .log_analyzer import LogAnalyzer
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Set up logging on stderr (stdout carries the protocol). Quiet by default so the
+# happy path writes nothing; MCP_LOG_LEVEL=INFO logs every request
+logging.basicConfig(
+    level=getattr(logging, os.getenv("MCP_LOG_LEVEL", "WARNING").upper(), logging.WARNING),
+    stream=sys.stderr
+)
 logger = logging.getLogger(__name__)
 
 
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create an event loop, using uvloop when it is installed."""
+    if uvloop is not None:
+        return uvloop.new_event_loop()
+    return asyncio.new_event_loop()
+
+
 class InfraMcpServer:
     """MCP Server for Infrastructure Monitoring."""
     
+    # Seconds a tool result is reused for identical arguments; tools not listed
+    # are never cached (the analyzer and monitor cache their own expensive parts)
+    _TOOL_CACHE_TTL = {
+        "get_system_info": 0.5,
+        "get_network_info": 1.0,
+        "get_logs": 2.0,
+    }
+    
     def __init__(self):
         self.infra_monitor = InfraMonitor()
-        self.log_analyzer = LogAnalyzer()
+        # Built off the startup path: by warm_up() in the background, or on first analysis
+        self._log_analyzer: Optional[LogAnalyzer] = None
+        self._log_analyzer_lock = threading.Lock()
         self.tools = self._initialize_tools()
+        
+        # Blocking collectors (psutil, subprocess, file reads) run here so they
+        # never stall the event loop that awaits Gemini. They mostly wait on I/O,
+        # so the pool is sized past the core count to let concurrent calls overlap
+        self._executor = ThreadPoolExecutor(
+            max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="mcp-tool"
+        )
+        
+        # Recent tool results: (tool name, arguments) -> (monotonic time, result)
+        self._tool_cache: Dict[Any, Any] = {}
+        
+        # Admission control: at most _max_in_flight tool calls execute at once,
+        # the rest wait on the condition (created per event loop)
+        self._max_in_flight = 8
+        self._in_flight = 0
+        self._admit_cv: Optional[asyncio.Condition] = None
+        self._admit_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Private loop for tool calls made through the synchronous handle_request
+        self._sync_loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Full input schemas by tool name, served on demand by tools/schema
+        self._full_schemas = {tool.name: tool.inputSchema for tool in self.tools}
+        
+        # Static list results, built once and shared by every response. With
+        # MCP_COMPACT_TOOLS set, tools/list omits parameter schemas; only clients
+        # that fetch them through tools/schema should enable it
+        listed_tools = self.tools
+        if os.getenv('MCP_COMPACT_TOOLS', '').lower() in ('1', 'true', 'yes'):
+            listed_tools = [Tool(tool.name, tool.description, {"type": "object"}) for tool in self.tools]
+        self._tools_list_result = dataclass_to_dict(ToolListResult(tools=listed_tools))
+        self._prompts_list_result = {"prompts": []}
+        self._initialize_result = dataclass_to_dict(InitializeResult(
+            capabilities=ServerCapabilities(
+                tools=ToolCapability(tools=True)
+            ),
+            serverInfo={
+                "name": "Infrastructure MCP Server",
+                "version": "1.0.0",
+                "description": "Infrastructure monitoring with AI-powered log analysis"
+            }
+        ))
+        self._resources_list_result = {"resources": []}
+        
+        # JSON-RPC methods and tools by name; handlers may be sync or async
+        self._method_handlers = {
+            "initialize": self._handle_initialize,
+            "tools/list": self._handle_tools_list,
+            "tools/call": self._handle_tool_call,
+            "tools/call_batch": self._handle_tool_call_batch,
+            "tools/schema": self._handle_tool_schema,
+            "prompts/list": self._handle_prompts_list,
+            "resources/list": self._handle_resources_list,
+        }
+        self._tool_handlers = {
+            "get_system_info": self._tool_get_system_info,
+            "get_service_status": self._tool_get_service_status,
+            "get_user_info": self._tool_get_user_info,
+            "get_logs": self._tool_get_logs,
+            "get_network_info": self._tool_get_network_info,
+            "analyze_logs": self._tool_analyze_logs,
+            "health_check": self._tool_health_check,
+        }
+    
+    @property
+    def log_analyzer(self) -> LogAnalyzer:
+        """The log analyzer, constructed on first use."""
+        if self._log_analyzer is None:
+            with self._log_analyzer_lock:
+                if self._log_analyzer is None:
+                    self._log_analyzer = LogAnalyzer()
+        return self._log_analyzer
+    
+    def warm_up(self):
+        """Construct the log analyzer, and so open its Gemini connection, in the background."""
+        threading.Thread(target=lambda: self.log_analyzer, name="log-analyzer-init", daemon=True).start()
     
     def _initialize_tools(self) -> List[Tool]:
         """Initialize available MCP tools."""
@@ -99,7 +207,15 @@ class InfraMcpServer:
                 description="Get network interface information and active connections",
                 inputSchema={
                     "type": "object",
-                    "properties": {},
+                    "properties": {
+                        "max_connections": {
+                            "type": "integer",
+                            "description": "Maximum number of connections to return",
+                            "default": 20,
+                            "minimum": 1,
+                            "maximum": 500
+                        }
+                    },
                     "required": []
                 }
             ),
@@ -149,27 +265,54 @@ class InfraMcpServer:
             )
         ]
     
-    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle incoming MCP requests synchronously.
+        
+        Methods without async work are answered directly; tool calls run on a
+        private event loop. Must not be called from a running event loop - use
+        handle_request_async there.
+        """
+        response = self._begin_request(request)
+        if not inspect.isawaitable(response):
+            return response
+        
+        if self._sync_loop is None or self._sync_loop.is_closed():
+            self._sync_loop = _new_event_loop()
+        try:
+            return self._sync_loop.run_until_complete(response)
+        except Exception as e:
+            logger.error(f"Error handling request: {e}")
+            return self._create_error_response(
+                request.get("id"), -32603, f"Internal error: {str(e)}"
+            )
+    
+    async def handle_request_async(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Handle incoming MCP requests."""
+        response = self._begin_request(request)
+        if not inspect.isawaitable(response):
+            return response
+        try:
+            return await response
+        except Exception as e:
+            logger.error(f"Error handling request: {e}")
+            return self._create_error_response(
+                request.get("id"), -32603, f"Internal error: {str(e)}"
+            )
+    
+    def _begin_request(self, request: Dict[str, Any]) -> Any:
+        """Dispatch a request; returns the response or an awaitable producing it."""
         try:
             method = request.get("method")
             params = request.get("params", {})
             request_id = request.get("id")
             
-            if method == "initialize":
-                return self._handle_initialize(request_id, params)
-            elif method == "tools/list":
-                return self._handle_tools_list(request_id)
-            elif method == "tools/call":
-                return await self._handle_tool_call(request_id, params)
-            elif method == "prompts/list":
-                return self._handle_prompts_list(request_id)
-            elif method == "resources/list":
-                return self._handle_resources_list(request_id)
-            else:
+            handler = self._method_handlers.get(method)
+            if handler is None:
                 return self._create_error_response(
                     request_id, -32601, f"Method not found: {method}"
                 )
+            
+            return handler(request_id, params)
                 
         except Exception as e:
             logger.error(f"Error handling request: {e}")
@@ -179,58 +322,56 @@ class InfraMcpServer:
     
     def _handle_initialize(self, request_id: Union[str, int], params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle initialize request."""
-        capabilities = ServerCapabilities(
-            tools=ToolCapability(tools=True)
-        )
-        
         # Use the client's protocol version if provided, otherwise default to 2024-11-05
         # Claude Desktop uses 2025-06-18, we should match or use a compatible version
         client_version = params.get("protocolVersion", "2024-11-05")
         
-        result = InitializeResult(
-            protocolVersion=client_version,
-            capabilities=capabilities,
-            serverInfo={
-                "name": "Infrastructure MCP Server",
-                "version": "1.0.0",
-                "description": "Infrastructure monitoring with AI-powered log analysis"
-            }
-        )
-        
         return {
             "jsonrpc": "2.0",
             "id": request_id,
-            "result": dataclass_to_dict(result)
+            "result": {**self._initialize_result, "protocolVersion": client_version}
         }
     
-    def _handle_tools_list(self, request_id: Union[str, int]) -> Dict[str, Any]:
+    def _handle_tools_list(self, request_id: Union[str, int], params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle tools/list request."""
-        result = ToolListResult(tools=self.tools)
-        
         return {
             "jsonrpc": "2.0",
             "id": request_id,
-            "result": dataclass_to_dict(result)
+            "result": self._tools_list_result
         }
     
-    def _handle_prompts_list(self, request_id: Union[str, int]) -> Dict[str, Any]:
-        """Handle prompts/list request."""
+    def _handle_tool_schema(self, request_id: Union[str, int], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle tools/schema request: the full input schema of one tool."""
+        tool_name = params.get("name")
+        schema = self._full_schemas.get(tool_name)
+        if schema is None:
+            return self._create_error_response(
+                request_id, -32602, f"Unknown tool: {tool_name}"
+            )
+        
         return {
             "jsonrpc": "2.0",
             "id": request_id,
             "result": {
-                "prompts": []
+                "name": tool_name,
+                "inputSchema": schema
             }
         }
     
-    def _handle_resources_list(self, request_id: Union[str, int]) -> Dict[str, Any]:
+    def _handle_prompts_list(self, request_id: Union[str, int], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle prompts/list request."""
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": self._prompts_list_result
+        }
+    
+    def _handle_resources_list(self, request_id: Union[str, int], params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle resources/list request."""
         return {
             "jsonrpc": "2.0",
             "id": request_id,
-            "result": {
-                "resources": []
-            }
+            "result": self._resources_list_result
         }
     
     async def _handle_tool_call(self, request_id: Union[str, int], params: Dict[str, Any]) -> Dict[str, Any]:
@@ -239,64 +380,27 @@ class InfraMcpServer:
         arguments = params.get("arguments", {})
         
         try:
-            if tool_name == "get_system_info":
-                result = self.infra_monitor.get_system_info()
-            elif tool_name == "get_service_status":
-                service_name = arguments.get("service_name")
-                result = self.infra_monitor.get_service_status(service_name)
-            elif tool_name == "get_user_info":
-                result = self.infra_monitor.get_user_info()
-            elif tool_name == "get_logs":
-                log_type = arguments.get("log_type", "syslog")
-                lines = arguments.get("lines", 100)
-                result = self.infra_monitor.get_logs(log_type, lines)
-            elif tool_name == "get_network_info":
-                result = self.infra_monitor.get_network_info()
-            elif tool_name == "analyze_logs":
-                log_type = arguments.get("log_type", "syslog")
-                analysis_type = arguments.get("analysis_type", "summary")
-                lines = arguments.get("lines", 100)
-                
-                # Get logs first
-                log_data = self.infra_monitor.get_logs(log_type, lines)
-                logs = log_data.get("logs", [])
-                
-                # Analyze logs
-                analysis = self.log_analyzer.analyze_logs(logs, analysis_type)
-                result = {
-                    "log_data": log_data,
-                    "analysis": analysis
-                }
-            elif tool_name == "health_check":
-                include_logs = arguments.get("include_logs", True)
-                
-                # Get system info
-                system_info = self.infra_monitor.get_system_info()
-                
-                # Get logs if requested
-                logs = []
-                if include_logs:
-                    log_data = self.infra_monitor.get_logs("syslog", 50)
-                    logs = log_data.get("logs", [])
-                
-                # Perform health analysis
-                health_analysis = self.log_analyzer.analyze_system_health(system_info, logs)
-                
-                result = {
-                    "system_info": system_info,
-                    "health_analysis": health_analysis,
-                    "timestamp": datetime.now().isoformat()
-                }
-            else:
+            handler = self._tool_handlers.get(tool_name)
+            if handler is None:
                 return self._create_error_response(
                     request_id, -32601, f"Unknown tool: {tool_name}"
                 )
             
+            async with self._admitted():
+                if inspect.iscoroutinefunction(handler):
+                    result = await handler(arguments)
+                else:
+                    result = await self._cached_tool_call(tool_name, handler, arguments)
+            
             # Format result for MCP
             tool_result = ToolResult(
                 content=[{
                     "type": "text",
-                    "text": json.dumps(result, indent=2, default=str)
+                    "text": orjson.dumps(
+                        result,
+                        option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS,
+                        default=str
+                    ).decode()
                 }]
             )
             
@@ -312,6 +416,159 @@ class InfraMcpServer:
                 request_id, -32603, f"Tool execution error: {str(e)}"
             )
     
+    async def _handle_tool_call_batch(self, request_id: Union[str, int], params: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle tools/call_batch request: run several tool calls concurrently."""
+        calls = params.get("calls")
+        if not isinstance(calls, list) or not all(isinstance(call, dict) for call in calls):
+            return self._create_error_response(
+                request_id, -32602, "calls must be an array of {name, arguments} objects"
+            )
+        
+        # Each call goes through the normal tools/call path, including admission
+        responses = await asyncio.gather(*(self._handle_tool_call(request_id, call) for call in calls))
+        return {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "result": {
+                "results": [
+                    response["result"] if "result" in response else {"error": response["error"]}
+                    for response in responses
+                ]
+            }
+        }
+    
+    def set_max_in_flight(self, limit: int):
+        """Change how many tool calls may execute at once; safe to call from any thread."""
+        self._max_in_flight = max(1, limit)
+        loop = self._admit_loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(lambda: loop.create_task(self._notify_admission()))
+            except RuntimeError:
+                pass  # Loop already closed
+    
+    async def _notify_admission(self):
+        """Wake waiting tool calls so they re-check the limit."""
+        async with self._admit_cv:
+            self._admit_cv.notify_all()
+    
+    @asynccontextmanager
+    async def _admitted(self):
+        """Hold one tool-execution slot for the duration of the block."""
+        loop = asyncio.get_running_loop()
+        if self._admit_cv is None or self._admit_loop is not loop:
+            self._admit_cv = asyncio.Condition()
+            self._admit_loop = loop
+        admission = self._admit_cv
+        
+        async with admission:
+            await admission.wait_for(lambda: self._in_flight < self._max_in_flight)
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            async with admission:
+                self._in_flight -= 1
+                admission.notify(1)
+    
+    async def _cached_tool_call(self, tool_name: str, handler: Callable, arguments: Dict[str, Any]) -> Any:
+        """Run a blocking tool, reusing a result younger than its TTL."""
+        ttl = self._TOOL_CACHE_TTL.get(tool_name)
+        try:
+            key = (tool_name, frozenset(arguments.items())) if ttl else None
+        except TypeError:
+            key = None  # Unhashable argument values
+        if key is None:
+            return await self._run_blocking(handler, arguments)
+        
+        now = time.monotonic()
+        hit = self._tool_cache.get(key)
+        if hit is not None and now - hit[0] < ttl:
+            return hit[1]
+        
+        result = await self._run_blocking(handler, arguments)
+        if len(self._tool_cache) >= 64:
+            # Drop entries older than the longest TTL before growing further
+            oldest = now - max(self._TOOL_CACHE_TTL.values())
+            self._tool_cache = {k: v for k, v in self._tool_cache.items() if v[0] > oldest}
+        self._tool_cache[key] = (time.monotonic(), result)
+        return result
+    
+    def _run_blocking(self, func: Callable, *args) -> "asyncio.Future":
+        """Run a blocking call on the tool thread pool."""
+        return asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+    
+    def _tool_get_system_info(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the get_system_info tool."""
+        return self.infra_monitor.get_system_info()
+    
+    def _tool_get_service_status(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the get_service_status tool."""
+        service_name = arguments.get("service_name")
+        return self.infra_monitor.get_service_status(service_name)
+    
+    def _tool_get_user_info(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the get_user_info tool."""
+        return self.infra_monitor.get_user_info()
+    
+    def _tool_get_logs(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the get_logs tool."""
+        log_type = arguments.get("log_type", "syslog")
+        lines = arguments.get("lines", 100)
+        return self.infra_monitor.get_logs(log_type, lines)
+    
+    def _tool_get_network_info(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the get_network_info tool."""
+        max_connections = arguments.get("max_connections", 20)
+        return self.infra_monitor.get_network_info(max_connections)
+    
+    async def _tool_analyze_logs(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the analyze_logs tool."""
+        log_type = arguments.get("log_type", "syslog")
+        analysis_type = arguments.get("analysis_type", "summary")
+        lines = arguments.get("lines", 100)
+        
+        # Get logs first
+        log_data = await self._run_blocking(self.infra_monitor.get_logs, log_type, lines)
+        logs = log_data.get("logs", [])
+        
+        # Analyze logs
+        analysis = await self.log_analyzer.aanalyze_logs(logs, analysis_type)
+        return {
+            "log_data": log_data,
+            "analysis": analysis
+        }
+    
+    async def _tool_health_check(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle the health_check tool."""
+        include_logs = arguments.get("include_logs", True)
+        
+        # Get system info and, if requested, logs in parallel; both go through
+        # the TTL cache so a health_check right after get_logs reuses its read
+        calls = [self._cached_tool_call("get_system_info", self._tool_get_system_info, {})]
+        if include_logs:
+            calls.append(self._cached_tool_call(
+                "get_logs", self._tool_get_logs, {"log_type": "syslog", "lines": 50}
+            ))
+        system_info, *log_data = await asyncio.gather(*calls)
+        logs = log_data[0].get("logs", ()) if log_data else ()
+        
+        # Perform health analysis
+        health_analysis = await self.log_analyzer.aanalyze_system_health(system_info, logs)
+        
+        return {
+            "system_info": system_info,
+            "health_analysis": health_analysis,
+            # Serialized to ISO 8601 by orjson along with the rest of the result
+            "timestamp": datetime.now()
+        }
+    
+    def close(self):
+        """Release the tool thread pool and the synchronous-call event loop."""
+        self._executor.shutdown(wait=False)
+        if self._sync_loop is not None and not self._sync_loop.is_closed():
+            self._sync_loop.close()
+    
     def _create_error_response(self, request_id: Union[str, int], code: int, message: str) -> Dict[str, Any]:
         """Create error response."""
         return {
@@ -324,96 +581,287 @@ class InfraMcpServer:
         }
 
 
+# Header names that start an LSP-style framed message, lowercased
+_HEADER_PREFIXES = (b'content-length:', b'content-type:')
+
+
+def _content_length(headers: bytes) -> Optional[int]:
+    """Parse the Content-Length value from an LSP-style header block."""
+    for header in headers.splitlines():
+        name, _, value = header.partition(b':')
+        if name.strip().lower() == b'content-length':
+            try:
+                length = int(value)
+            except ValueError:
+                return None
+            return length if length >= 0 else None
+    return None
+
+
+def _split_messages(buffer: bytearray) -> List[bytes]:
+    """Remove and return the complete messages at the front of buffer.
+    
+    Each message is either a line of JSON or, when its first line is a
+    ``Content-Length:``/``Content-Type:`` header, a header block ended by a
+    blank line (CRLF or LF line endings) and followed by an N-byte body. Any
+    other line, even one that is not JSON, is passed on as a message of its
+    own, as is a header line followed by anything but another header or the
+    blank line.
+    """
+    messages = []
+    pos = 0
+    size = len(buffer)
+    while pos < size:
+        if buffer[pos] in b' \t\r\n':
+            pos += 1
+            continue
+        
+        # Decide the framing only once the first line is complete
+        line_end = buffer.find(b'\n', pos)
+        if line_end < 0:
+            break
+        
+        if buffer[pos:pos + 15].lower().startswith(_HEADER_PREFIXES):
+            # Walk the following lines up to the blank line ending the block
+            cursor = line_end + 1
+            header_end = body_start = -1
+            while True:
+                next_end = buffer.find(b'\n', cursor)
+                if next_end < 0:
+                    break
+                line = buffer[cursor:next_end].rstrip(b'\r')
+                if not line:
+                    header_end, body_start = cursor, next_end + 1
+                    break
+                if not line[:15].lower().startswith(_HEADER_PREFIXES):
+                    # Not a header block after all
+                    header_end = body_start = None
+                    break
+                cursor = next_end + 1
+            
+            if header_end is None:
+                messages.append(bytes(buffer[pos:line_end]).rstrip(b'\r'))
+                pos = line_end + 1
+                continue
+            if header_end < 0:
+                break
+            length = _content_length(bytes(buffer[pos:header_end]))
+            if length is None:
+                # Malformed header: hand it on so the client gets a parse error
+                messages.append(bytes(buffer[pos:header_end]).rstrip())
+                pos = body_start
+                continue
+            body_end = body_start + length
+            if body_end > size:
+                break
+            messages.append(bytes(buffer[body_start:body_end]))
+            pos = body_end
+        else:
+            messages.append(bytes(buffer[pos:line_end]))
+            pos = line_end + 1
+    
+    del buffer[:pos]
+    return messages
+
+
 class StdioMcpServer:
     """MCP Server that communicates via stdio."""
     
-    def __init__(self):
+    # Constant error line, serialized once
+    _PARSE_ERROR_LINE = orjson.dumps({
+        "jsonrpc": "2.0",
+        "id": None,
+        "error": {
+            "code": -32700,
+            "message": "Parse error"
+        }
+    }, option=orjson.OPT_APPEND_NEWLINE)
+    
+    def __init__(self, max_in_flight: int = 32):
         self.server = InfraMcpServer()
+        # One event loop for the server's lifetime instead of one per request
+        self._loop = _new_event_loop()
+        # Messages handled concurrently; new ones wait while all are busy. Tool
+        # executions are bounded separately by the server's admission control
+        self.max_in_flight = max_in_flight
+        # Serialized response lines for the writer thread; None stops it
+        self._out_q: "queue.SimpleQueue[Optional[bytes]]" = queue.SimpleQueue()
+        # Responses use Content-Length framing instead of newlines; incoming
+        # framing is detected per message either way
+        self.lsp_framing = os.getenv("MCP_FRAMING", "").lower() == "lsp"
     
     def run(self):
         """Run the MCP server with stdio transport."""
-        # Write to stderr so Claude Desktop can see it in logs
-        print("Starting Infrastructure MCP Server...", file=sys.stderr, flush=True)
+        # Logging goes to stderr so Claude Desktop can see it in logs
         logger.info("Starting Infrastructure MCP Server...")
         
+        writer = threading.Thread(target=self._write_stdout, name="mcp-stdout", daemon=True)
+        writer.start()
+        # Ready Gemini while the client is still initializing, not on the first analysis
+        self.server.warm_up()
         try:
-            while True:
-                # Read line from stdin
-                try:
-                    line = sys.stdin.readline()
-                except Exception as e:
-                    print(f"Error reading stdin: {e}", file=sys.stderr, flush=True)
-                    logger.error(f"Error reading stdin: {e}")
-                    break
-                
-                if not line:
-                    print("EOF received on stdin, server stopping", file=sys.stderr, flush=True)
-                    logger.info("EOF received, server stopping")
-                    break
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                try:
-                    # Parse JSON request
-                    request = json.loads(line)
-                    method = request.get('method', 'unknown')
-                    request_id = request.get('id', 'none')
-                    
-                    print(f"Received request: {method} (id: {request_id})", file=sys.stderr, flush=True)
-                    logger.info(f"Received: {method} (id: {request_id})")
-                    
-                    # Handle notifications (no response needed)
-                    if 'id' not in request:
-                        # For notifications, we don't send a response
-                        if method == 'notifications/initialized':
-                            print("Client sent initialized notification", file=sys.stderr, flush=True)
-                            logger.info("Client initialized successfully")
-                        else:
-                            print(f"Received notification: {method}", file=sys.stderr, flush=True)
-                            logger.info(f"Received notification: {method}")
-                        continue
-                    
-                    # Handle request (make it synchronous)
-                    response = asyncio.run(self.server.handle_request(request))
-                    
-                    # Send response
-                    response_str = json.dumps(response)
-                    print(response_str)
-                    sys.stdout.flush()
-                    
-                    print(f"Sent response for: {method} ({len(response_str)} bytes)", file=sys.stderr, flush=True)
-                    logger.info(f"Sent response for: {method}")
-                    
-                except json.JSONDecodeError as e:
-                    print(f"JSON decode error: {e}", file=sys.stderr, flush=True)
-                    logger.error(f"Invalid JSON received: {e}")
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "id": None,
-                        "error": {
-                            "code": -32700,
-                            "message": "Parse error"
-                        }
-                    }
-                    print(json.dumps(error_response))
-                    sys.stdout.flush()
-                except Exception as e:
-                    print(f"Error processing request: {e}", file=sys.stderr, flush=True)
-                    logger.error(f"Error processing request: {e}")
-                    
+            self._loop.run_until_complete(self._serve())
         except KeyboardInterrupt:
-            print("Server stopped by user (KeyboardInterrupt)", file=sys.stderr, flush=True)
             logger.info("Server stopped by user")
         except Exception as e:
-            print(f"Server error: {e}", file=sys.stderr, flush=True)
-            logger.error(f"Server error: {e}")
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.exception(f"Server error: {e}")
         finally:
-            print("Infrastructure MCP Server stopped", file=sys.stderr, flush=True)
+            # Flush responses already queued before exiting
+            self._out_q.put(None)
+            writer.join()
+            self.server.close()
+            self._loop.close()
             logger.info("Infrastructure MCP Server stopped")
+    
+    async def _serve(self):
+        """Read requests from stdin and handle each as its own task."""
+        lines: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue()
+        # Daemon thread, so a blocked read never holds up interpreter exit
+        threading.Thread(target=self._read_stdin, args=(lines,), name="mcp-stdin", daemon=True).start()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        pending = set()
+        
+        while True:
+            line = await lines.get()
+            if line is None:
+                logger.info("EOF received, server stopping")
+                break
+            
+            line = line.strip()
+            if not line:
+                continue
+            
+            await slots.acquire()
+            task = self._loop.create_task(self._handle_line(line, slots))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        
+        # Let requests already read finish before shutting down
+        if pending:
+            await asyncio.gather(*pending)
+    
+    def _read_stdin(self, lines: "asyncio.Queue[Optional[bytes]]"):
+        """Feed stdin messages to the event loop, then None at EOF."""
+        # Raw reads on the descriptor: unlike sys.stdin.buffer, no lock is held
+        # while blocked, which would abort interpreter shutdown in a daemon thread
+        fd = sys.stdin.fileno()
+        buffered = bytearray()
+        try:
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                buffered += chunk
+                for message in _split_messages(buffered):
+                    self._loop.call_soon_threadsafe(lines.put_nowait, message)
+            if buffered:
+                self._loop.call_soon_threadsafe(lines.put_nowait, bytes(buffered))
+            self._loop.call_soon_threadsafe(lines.put_nowait, None)
+        except RuntimeError:
+            pass  # Loop already closed
+        except Exception as e:
+            logger.error(f"Error reading stdin: {e}")
+            self._loop.call_soon_threadsafe(lines.put_nowait, None)
+    
+    async def _handle_line(self, line: bytes, slots: asyncio.Semaphore):
+        """Handle one JSON-RPC message or batch and write its response."""
+        try:
+            # Parse JSON request
+            request = orjson.loads(line)
+            
+            if isinstance(request, list):
+                # Batch: dispatch all members concurrently and answer with one array
+                if not request:
+                    self._write(self._invalid_request())
+                    return
+                responses = await asyncio.gather(*(self._dispatch(message) for message in request))
+                responses = [response for response in responses if response is not None]
+                if responses:
+                    size = self._write(responses)
+                    logger.info(f"Sent batch response for {len(responses)} requests ({size} bytes)")
+                return
+            
+            response = await self._dispatch(request)
+            if response is not None:
+                size = self._write(response)
+                # Scalars and other non-objects were answered with Invalid Request
+                method = request.get('method', 'unknown') if isinstance(request, dict) else 'invalid'
+                logger.info(f"Sent response for: {method} ({size} bytes)")
+            
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Invalid JSON received: {e}")
+            self._write_line(self._PARSE_ERROR_LINE)
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+        finally:
+            slots.release()
+    
+    async def _dispatch(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Handle one parsed message; returns None for notifications."""
+        if not isinstance(request, dict):
+            return self._invalid_request()
+        
+        method = request.get('method', 'unknown')
+        request_id = request.get('id', 'none')
+        
+        logger.info(f"Received: {method} (id: {request_id})")
+        
+        # Handle notifications (no response needed)
+        if 'id' not in request:
+            if method == 'notifications/initialized':
+                logger.info("Client initialized successfully")
+            else:
+                logger.info(f"Received notification: {method}")
+            return None
+        
+        return await self.server.handle_request_async(request)
+    
+    def _invalid_request(self) -> Dict[str, Any]:
+        """Error response for a message that is not a JSON-RPC request object."""
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {
+                "code": -32600,
+                "message": "Invalid Request"
+            }
+        }
+    
+    def _write(self, message: Union[Dict[str, Any], List[Dict[str, Any]]]) -> int:
+        """Write one JSON-RPC message or batch to stdout as a line; returns its size in bytes."""
+        return self._write_line(orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE))
+    
+    def _write_line(self, data: bytes) -> int:
+        """Queue a serialized, newline-terminated message for stdout; returns its size without the newline."""
+        size = len(data) - 1
+        if self.lsp_framing:
+            data = b'Content-Length: %d\r\n\r\n' % size + data[:size]
+        self._out_q.put(data)
+        return size
+    
+    def _write_stdout(self):
+        """Writer thread: drain queued lines to stdout, one flush per burst."""
+        out = sys.stdout.buffer
+        while True:
+            lines = [self._out_q.get()]
+            # Coalesce everything else already queued into the same write
+            while True:
+                try:
+                    lines.append(self._out_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = None in lines
+            if stop:
+                lines = lines[:lines.index(None)]
+            try:
+                if lines:
+                    out.write(b''.join(lines))
+                    out.flush()
+            except OSError as e:
+                logger.error(f"Error writing stdout: {e}")
+            if stop:
+                return
 
 
 def main():
@@ -3,34 +3,46 @@
 Command-line interface for testing the Infrastructure MCP Server.
 """
 
-import json
-import asyncio
+import os
 import sys
-from typing import Dict, Any
+import itertools
+from typing import Dict, Any, List, Tuple
+
+import orjson
+
 from infra_mcp.server import InfraMcpServer
 
 
-async def test_tool(server: InfraMcpServer, tool_name: str, arguments: Dict[str, Any] = None):
-    """Test a specific tool."""
-    if arguments is None:
-        arguments = {}
-    
+# Tool calls exercised by the CLI; they are independent, so they run concurrently
+TOOL_TESTS: List[Tuple[str, Dict[str, Any]]] = [
+    ("get_system_info", {}),
+    ("get_service_status", {}),
+    ("get_user_info", {}),
+    *(("get_logs", {"log_type": log_type, "lines": 10}) for log_type in ("syslog", "dmesg")),
+    ("get_network_info", {}),
+    *(
+        ("analyze_logs", {"log_type": "syslog", "analysis_type": analysis_type, "lines": 20})
+        for analysis_type in ("summary", "errors", "security", "performance")
+    ),
+    ("health_check", {"include_logs": True}),
+]
+
+
+# Request ids, unique for the life of the process
+_request_ids = itertools.count(1)
+
+
+def rpc(method: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    """Build a JSON-RPC request with the next request id."""
+    return {"jsonrpc": "2.0", "id": next(_request_ids), "method": method, "params": params or {}}
+
+
+def print_tool_result(tool_name: str, response: Dict[str, Any]):
+    """Print the outcome of one tool call."""
     print(f"\n{'='*60}")
     print(f"Testing: {tool_name}")
     print('='*60)
     
-    request = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "tools/call",
-        "params": {
-            "name": tool_name,
-            "arguments": arguments
-        }
-    }
-    
-    response = await server.handle_request(request)
-    
     if "error" in response:
         print(f"❌ Error: {response['error']}")
     else:
@@ -39,16 +51,38 @@ async def test_tool(server: InfraMcpServer, tool_name: str, arguments: Dict[str,
         if content and len(content) > 0:
             text = content[0].get("text", "")
             try:
-                data = json.loads(text)
-                print(json.dumps(data, indent=2, default=str))
-            except json.JSONDecodeError:
+                data = orjson.loads(text)
+                print(orjson.dumps(data, option=orjson.OPT_INDENT_2, default=str).decode())
+            except orjson.JSONDecodeError:
                 print(text)
         else:
             print("No content returned")
 
 
-async def main():
+def run_tool_tests(server: InfraMcpServer, tests: List[Tuple[str, Dict[str, Any]]]):
+    """Run tool calls as one concurrent batch, then print each result in order."""
+    request = rpc("tools/call_batch", {
+        "calls": [{"name": name, "arguments": arguments} for name, arguments in tests]
+    })
+    response = server.handle_request(request)
+    if "error" in response:
+        raise RuntimeError(f"Batch failed: {response['error']}")
+    
+    results = response["result"]["results"]
+    assert len(results) == len(tests), f"{len(results)} results for {len(tests)} calls"
+    for (name, arguments), result in zip(tests, results):
+        label = arguments.get("analysis_type") or arguments.get("log_type")
+        # Shape each entry like a single tools/call response for printing
+        single = {"error": result["error"]} if "error" in result else {"result": result}
+        print_tool_result(f"{name} ({label})" if label else name, single)
+
+
+def main():
     """Main CLI function."""
+    # Exercise the tool plumbing without Gemini round trips; set
+    # INFRAGPT_LLM_MODE=gemini to test real analyses
+    os.environ.setdefault("INFRAGPT_LLM_MODE", "mock")
+    
     print("\n" + "="*60)
     print("🚀 Infrastructure MCP Server - Test Client")
     print("="*60)
@@ -59,33 +93,23 @@ async def main():
     print("\n" + "="*60)
     print("Testing: Server Initialization")
     print("="*60)
-    init_request = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": "initialize",
-        "params": {
-            "protocolVersion": "1.0",
-            "capabilities": {},
-            "clientInfo": {"name": "test-client", "version": "1.0"}
-        }
-    }
+    init_request = rpc("initialize", {
+        "protocolVersion": "1.0",
+        "capabilities": {},
+        "clientInfo": {"name": "test-client", "version": "1.0"}
+    })
     
-    response = await server.handle_request(init_request)
+    response = server.handle_request(init_request)
     print("✅ Initialization successful")
-    print(json.dumps(response, indent=2))
+    print(orjson.dumps(response, option=orjson.OPT_INDENT_2).decode())
     
     # Test tools list
     print("\n" + "="*60)
     print("Testing: Available Tools List")
     print("="*60)
-    tools_request = {
-        "jsonrpc": "2.0",
-        "id": 2,
-        "method": "tools/list",
-        "params": {}
-    }
+    tools_request = rpc("tools/list")
     
-    response = await server.handle_request(tools_request)
+    response = server.handle_request(tools_request)
     tools = response.get("result", {}).get("tools", [])
     print(f"✅ Found {len(tools)} available tools:\n")
     for i, tool in enumerate(tools, 1):
@@ -97,13 +121,7 @@ async def main():
     print("🔧 TESTING ALL TOOLS")
     print("="*60)
     
-    await test_tool(server, "get_system_info")
-    await test_tool(server, "get_service_status")
-    await test_tool(server, "get_user_info")
-    await test_tool(server, "get_logs", {"log_type": "syslog", "lines": 10})
-    await test_tool(server, "get_network_info")
-    await test_tool(server, "analyze_logs", {"log_type": "syslog", "analysis_type": "summary", "lines": 20})
-    await test_tool(server, "health_check", {"include_logs": True})
+    run_tool_tests(server, TOOL_TESTS)
     
     print("\n" + "="*60)
     print("🎉 All tests completed successfully!")
@@ -112,7 +130,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        main()
     except KeyboardInterrupt:
         print("\n\nTest interrupted by user")
         sys.exit(0)
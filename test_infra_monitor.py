@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Unit tests for InfraMonitor's systemctl parsing
+"""
+import types
+
+import pytest
+
+from infra_mcp import infra_monitor
+from infra_mcp.infra_monitor import InfraMonitor
+
+# systemctl show output for three units: one blank-line separated block each
+SYSTEMCTL_SHOW = (
+    "ActiveState=active\nUnitFileState=enabled\n\n"
+    "ActiveState=inactive\nUnitFileState=\n\n"
+    "ActiveState=failed\nUnitFileState=disabled\n"
+)
+
+
+@pytest.fixture
+def systemctl(monkeypatch):
+    """Replace subprocess.run with a fake systemctl that records its command lines"""
+    fake = types.SimpleNamespace(calls=[], returncode=0)
+    
+    def run(args, **kwargs):
+        fake.calls.append(args)
+        return types.SimpleNamespace(returncode=fake.returncode, stdout=SYSTEMCTL_SHOW, stderr="")
+    
+    monkeypatch.setattr(infra_monitor.subprocess, "run", run)
+    return fake
+
+
+def test_systemctl_show_parsed_per_unit(systemctl):
+    """Each block maps to its unit, with empty states falling back"""
+    services = InfraMonitor()._query_systemd_services(["nginx", "ssh", "docker.socket"])
+    
+    assert systemctl.calls[0][-3:] == ["nginx.service", "ssh.service", "docker.socket"]
+    assert {name: (s["status"], s["enabled"]) for name, s in services.items()} == {
+        "nginx": ("active", "enabled"),
+        "ssh": ("inactive", "unknown"),
+        "docker.socket": ("failed", "disabled"),
+    }
+
+
+def test_systemctl_failure_reports_inactive(systemctl):
+    """A failing systemctl reports every service as inactive"""
+    systemctl.returncode = 1
+    services = InfraMonitor()._query_systemd_services(["nginx", "ssh"])
+    assert {s["status"] for s in services.values()} == {"inactive"}
+    assert {s["enabled"] for s in services.values()} == {"unknown"}
+
+
+def test_missing_systemctl_reports_nothing(monkeypatch):
+    """Without systemctl no services are reported"""
+    def run(args, **kwargs):
+        raise FileNotFoundError(args[0])
+    
+    monkeypatch.setattr(infra_monitor.subprocess, "run", run)
+    assert InfraMonitor()._query_systemd_services(["nginx"]) == {}
+
+
+def test_bulk_status_reused_within_ttl(systemctl):
+    """Repeated lookups of the same services share one systemctl call"""
+    monitor = InfraMonitor()
+    first = monitor._get_systemd_services_bulk(["nginx", "ssh", "docker.socket"])
+    second = monitor._get_systemd_services_bulk(["nginx", "ssh", "docker.socket"])
+    assert second is first
+    assert len(systemctl.calls) == 1
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Unit tests for LogAnalyzer prompt building, caching and Gemini key handling
+"""
+import asyncio
+import threading
+import types
+from datetime import datetime
+
+import pytest
+
+from infra_mcp import log_analyzer
+from infra_mcp.log_analyzer import LogAnalyzer
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    """A mock-mode analyzer with no API keys or disk cache"""
+    for name in ["GEMINI_API_KEY", "INFRAGPT_CACHE_DIR"] + [f"GEMINI_API_KEY_{i}" for i in range(1, 9)]:
+        monkeypatch.delenv(name, raising=False)
+    return LogAnalyzer()
+
+
+def test_health_prompt_formats_datetimes_as_iso(analyzer):
+    """Datetimes in system info reach the prompt and mock report as ISO 8601"""
+    system_info = {"cpu_percent": 10.0, "boot_time": datetime(2026, 10, 15, 6, 18, 4)}
+    
+    prompt = analyzer._health_prompt(system_info, ["ok"])
+    assert "2026-10-15T06:18:04" in prompt
+    assert "datetime.datetime" not in prompt
+    
+    report = analyzer._mock_health_analysis(system_info, [])["health_analysis"]
+    assert "Boot time: 2026-10-15T06:18:04" in report
+
+
+class _QuotaExceeded(Exception):
+    """Stands in for google.api_core's ResourceExhausted"""
+
+
+class _FakeClientManager:
+    """Records the key each client is built for, like genai's _ClientManager"""
+    
+    def configure(self, api_key=None):
+        self.api_key = api_key
+    
+    def make_client(self, name):
+        return types.SimpleNamespace(name=name, api_key=self.api_key)
+
+
+class _FakeModel:
+    """GenerativeModel whose calls fail while its client holds the first key"""
+    calls = []
+    
+    def __init__(self, *args, **kwargs):
+        self._client = None
+        self._async_client = None
+    
+    def count_tokens(self, *args, **kwargs):
+        return None
+    
+    def _respond(self, client):
+        _FakeModel.calls.append(client.api_key)
+        if client.api_key == "key-1":
+            raise _QuotaExceeded("429 quota exceeded")
+        return types.SimpleNamespace(text=f"answered with {client.api_key}")
+    
+    def generate_content(self, prompt, **kwargs):
+        return self._respond(self._client)
+    
+    async def generate_content_async(self, prompt, **kwargs):
+        return self._respond(self._async_client)
+
+
+@pytest.fixture
+def two_key_analyzer(monkeypatch):
+    """An analyzer with two keys, backed by the fake SDK"""
+    monkeypatch.setattr(log_analyzer, "genai", types.SimpleNamespace(
+        # A process-wide configure must not decide which key a model uses
+        configure=lambda **kwargs: None,
+        GenerativeModel=_FakeModel,
+    ))
+    monkeypatch.setattr(log_analyzer, "genai_client", types.SimpleNamespace(_ClientManager=_FakeClientManager))
+    monkeypatch.setattr(log_analyzer, "_ROTATABLE_ERRORS", (_QuotaExceeded,))
+    monkeypatch.setattr(LogAnalyzer, "_MODELS", {})
+    monkeypatch.setattr(LogAnalyzer, "_CLIENT_MANAGERS", {})
+    monkeypatch.setattr(LogAnalyzer, "_ASYNC_CLIENT_LOOPS", {})
+    monkeypatch.setenv("GEMINI_API_KEY_1", "key-1")
+    monkeypatch.setenv("GEMINI_API_KEY_2", "key-2")
+    monkeypatch.delenv("INFRAGPT_LLM_MODE", raising=False)
+    monkeypatch.delenv("INFRAGPT_CACHE_DIR", raising=False)
+    _FakeModel.calls = []
+    analyzer = LogAnalyzer()
+    assert not analyzer.mock_mode
+    return analyzer
+
+
+def test_rotated_retry_uses_second_key(two_key_analyzer):
+    """After a quota error the retry goes out on the next key's client"""
+    response = two_key_analyzer._generate("prompt")
+    assert _FakeModel.calls == ["key-1", "key-2"]
+    assert response.text == "answered with key-2"
+
+
+def test_rotated_async_retry_uses_second_key(two_key_analyzer):
+    """The lazily built async clients are bound to their own keys too"""
+    response = asyncio.run(two_key_analyzer._agenerate("prompt"))
+    assert _FakeModel.calls == ["key-1", "key-2"]
+    assert response.text == "answered with key-2"
+
+
+def test_async_client_rebuilt_per_event_loop(two_key_analyzer):
+    """A client created on a closed loop is not reused by the next one"""
+    model = LogAnalyzer._get_model("key-2")
+    clients = []
+    
+    async def call():
+        await two_key_analyzer._agenerate("prompt")
+        clients.append(model._async_client)
+    
+    asyncio.run(call())
+    asyncio.run(call())
+    assert clients[0] is not clients[1]
+
+
+def test_concurrent_rotation_advances_key_once(two_key_analyzer, monkeypatch):
+    """Calls failing on the same key together both retry on the next key"""
+    barrier = threading.Barrier(2)
+    respond = _FakeModel._respond
+    
+    def respond_together(self, client):
+        if client.api_key == "key-1":
+            barrier.wait(timeout=5)
+        return respond(self, client)
+    
+    monkeypatch.setattr(_FakeModel, "_respond", respond_together)
+    threads = [threading.Thread(target=two_key_analyzer._generate, args=("prompt",)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(_FakeModel.calls) == ["key-1", "key-1", "key-2", "key-2"]
+    assert two_key_analyzer._key_index == 1
+    assert two_key_analyzer.api_key == "key-2"
+
+
+def test_prepare_log_text_keeps_failing_heartbeats():
+    """Only low-level heartbeat chatter is dropped, never a reported failure"""
+    logs = [
+        "INFO heartbeat ok",
+        "DEBUG keepalive sent",
+        "ERROR keepalive timeout to db01",
+        "heartbeat missed, node fenced",
+    ]
+    text = log_analyzer._prepare_log_text(logs)
+    assert text.splitlines() == ["ERROR keepalive timeout to db01", "heartbeat missed, node fenced"]
+
+
+def test_prepare_log_text_drops_syslog_noise():
+    """The level is found after a syslog timestamp, host and tag"""
+    logs = [
+        "Oct 15 09:12:01 web01 app[1]: DEBUG cache miss",
+        "Oct 15 09:12:02 web01 app[1]: INFO heartbeat ok",
+        "Oct 15 09:12:03 web01 app[1]: ERROR keepalive timeout to db01",
+        "Oct 15 09:12:04 web01 app[1]: INFO request served",
+    ]
+    text = log_analyzer._prepare_log_text(logs)
+    assert text.splitlines() == logs[2:]
+
+
+def test_memory_cache_survives_concurrent_eviction(analyzer):
+    """Lookups racing with evictions from other threads never raise"""
+    errors = []
+    
+    def churn(offset):
+        try:
+            for i in range(2000):
+                key = ("summary", str((offset + i) % 40))
+                analyzer._cache_put(key, {"analysis": "x"}, max_entries=8, persist=False)
+                analyzer._cache_get(("summary", str(i % 40)), 1)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=churn, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(analyzer._cache) <= 8
+
+
+def test_multi_analysis_splits_sections(analyzer, monkeypatch):
+    """Each type gets its own section, with or without the focus after the heading"""
+    text = (
+        "## SUMMARY\nAll services up.\n\n"
+        "## ERRORS: critical errors and their severity\nnginx exited with status 1.\n\n"
+        "##SECURITY:\nFailed password for admin.\n"
+    )
+    monkeypatch.setattr(analyzer, "mock_mode", False)
+    monkeypatch.setattr(analyzer, "_generate", lambda prompt, **kwargs: types.SimpleNamespace(text=text))
+    
+    results = analyzer.analyze_logs_multi(["line"], ["summary", "errors", "security", "performance"])
+    assert results["summary"]["analysis"] == "All services up."
+    assert results["errors"]["analysis"] == "nginx exited with status 1."
+    assert results["security"]["analysis"] == "Failed password for admin."
+    assert results["performance"]["analysis"] == text
+
+
+def test_nominal_health_names_elevated_metrics(analyzer):
+    """A skipped analysis never calls elevated usage normal"""
+    healthy = {"cpu_percent": 12.0, "memory": {"percent": 40.0}, "disk": {"percent": 50.0}}
+    report = analyzer._nominal_health(healthy, ["ok"])["health_analysis"]
+    assert "within normal range" in report
+    
+    busy_disk = {"cpu_percent": 12.0, "memory": {"percent": 40.0}, "disk": {"percent": 89.0}}
+    result = analyzer._nominal_health(busy_disk, ["ok"])
+    assert result["health_score"] == 9
+    assert "Elevated usage: disk" in result["health_analysis"]
+    assert "within normal range" not in result["health_analysis"]
+
+
+def test_cache_hit_reports_current_log_count(analyzer, monkeypatch):
+    """Calls whose prompts match share an analysis but not a line count"""
+    monkeypatch.setattr(analyzer, "mock_mode", False)
+    monkeypatch.setattr(analyzer, "_generate", lambda prompt, **kwargs: types.SimpleNamespace(text="ok"))
+    
+    first = analyzer.analyze_logs(["DEBUG tick", "disk full"], "errors")
+    second = analyzer.analyze_logs(["DEBUG tick", "DEBUG tock", "disk full"], "errors")
+    assert first["logs_analyzed"] == 2
+    assert second["cached"] is True
+    assert second["logs_analyzed"] == 3
+
+
+def test_breaker_opens_after_repeated_failures_and_cools_down(two_key_analyzer, monkeypatch):
+    """Three failures in a row pause Gemini calls until the cooldown has passed"""
+    now = [1000.0]
+    monkeypatch.setattr(log_analyzer.time, "monotonic", lambda: now[0])
+    
+    def fail(self, prompt, **kwargs):
+        _FakeModel.calls.append("failed")
+        raise ValueError("invalid argument")
+    
+    monkeypatch.setattr(_FakeModel, "generate_content", fail)
+    for _ in range(log_analyzer._BREAKER_THRESHOLD):
+        with pytest.raises(ValueError):
+            two_key_analyzer._generate("prompt")
+    
+    with pytest.raises(RuntimeError, match="Gemini disabled"):
+        two_key_analyzer._generate("prompt")
+    assert len(_FakeModel.calls) == log_analyzer._BREAKER_THRESHOLD
+    
+    now[0] += log_analyzer._BREAKER_COOLDOWN + 1
+    with pytest.raises(ValueError):
+        two_key_analyzer._generate("prompt")
+    assert len(_FakeModel.calls) == log_analyzer._BREAKER_THRESHOLD + 1
+
+
+def test_disk_cache_expires(monkeypatch, tmp_path):
+    """Disk entries are shared across instances until the TTL, then ignored and pruned"""
+    monkeypatch.setenv("INFRAGPT_CACHE_DIR", str(tmp_path))
+    now = [1_000_000.0]
+    monkeypatch.setattr(log_analyzer.time, "time", lambda: now[0])
+    key = ("summary", "digest")
+    
+    LogAnalyzer()._disk_put(key, {"analysis": "cached"})
+    restarted = LogAnalyzer()
+    assert restarted._disk_get(key) == {"analysis": "cached"}
+    
+    now[0] += log_analyzer._DISK_CACHE_TTL + 1
+    assert restarted._disk_get(key) is None
+    restarted._disk_put(("summary", "other"), {"analysis": "new"})
+    rows = restarted._disk_cache.execute("SELECT key FROM analyses").fetchall()
+    assert [row[0] for row in rows] == [f"{log_analyzer._MODEL_NAME}:summary:other"]